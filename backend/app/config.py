@@ -19,6 +19,18 @@ class Settings(BaseSettings):
     ratelimit_requests: int = Field(default=60, ge=1)
     ratelimit_window_seconds: int = Field(default=60, ge=1)
 
+    # Shared Maps response cache; set MAPS_CACHE_PATH (e.g. /dev/shm/llm-maps-cache) to enable
+    maps_cache_path: str | None = Field(default=None)
+    maps_cache_bytes: int = Field(default=64 * 1024 * 1024, ge=1024 * 1024)
+    maps_cache_ttl_seconds: int = Field(default=300, ge=1)
+
+    # Geocode memo for directions origins/destinations; GEOCODE_MEMO_PATH persists it as JSON
+    geocode_memo_entries: int = Field(default=2048, ge=1)
+    geocode_memo_path: str | None = Field(default=None)
+    # Per-worker memo of directions responses keyed by canonical origin/destination/mode
+    route_memo_entries: int = Field(default=256, ge=1)
+    route_memo_ttl_seconds: int = Field(default=300, ge=1)
+
 @lru_cache
 def get_settings() -> Settings:
     return Settings()  # type: ignore[arg-type]
@@ -0,0 +1,331 @@
+"""
+Place string canonicalization and a bounded geocode memo for directions requests
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, get_args
+from pydantic import BaseModel
+from .config import get_settings
+from .google_maps import CACHEABLE_STATUSES
+from .schemas import TravelMode
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts save without cross-worker locking
+    fcntl = None
+
+if TYPE_CHECKING:
+    from .google_maps import GoogleMapsClient
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"\s+")
+_COMMA = re.compile(r"\s*,\s*")
+_TRAVEL_MODES = set(get_args(TravelMode))
+# Misses are batched into one background save instead of a rewrite per miss
+_SAVE_DELAY_SECONDS = 5.0
+
+
+def canonicalize_place(text: str) -> str:
+    """
+    Fold cosmetic differences ("Seoul", " seoul ", "SEOUL.") into one string
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _WHITESPACE.sub(" ", text)
+    text = _COMMA.sub(", ", text).strip(" ,.;")
+    return text.casefold()
+
+
+def canonicalize_mode(mode: str | None) -> str | None:
+    """
+    Best-effort travel mode for free text (chat); API routes validate strictly
+    """
+    if not mode:
+        return None
+    mode = mode.strip().lower()
+    return mode if mode in _TRAVEL_MODES else None
+
+
+class _Coalescer:
+    """
+    Shares one in-flight call per key between concurrent requests.
+
+    If the request that started the call is cancelled, waiters retry with
+    their own call instead of inheriting the cancellation.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Any, asyncio.Future] = {}
+
+    async def run(self, key: Any, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        while True:
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; mark retrieved so an unawaited future doesn't warn
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+class ResolvedPlace(BaseModel):
+    query: str
+    key: str  # "place_id:<id>" when geocoded, else the canonical string
+    place_id: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    formatted_address: Optional[str] = None
+
+
+class GeocodeMemo:
+    """
+    LRU memo of canonical place string -> geocode result.
+
+    Spellings that canonicalize differently ("Seoul, South Korea", "서울")
+    still converge on one place_id key once resolved, so directions requests
+    built from ``key`` share RouteMemo (and shared cache) entries. Concurrent
+    resolves of the same string are coalesced into a single geocode call.
+    Only definitive answers (OK, ZERO_RESULTS) are memoized. With ``path``
+    set, the memo is merged into that file on a debounced background save
+    and on shutdown. Counters are per worker process.
+    """
+
+    def __init__(self, max_entries: int = 2048, path: str | None = None) -> None:
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[str, ResolvedPlace] = OrderedDict()
+        self._coalescer = _Coalescer()
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_task: Optional[asyncio.Task] = None
+        self.lookups = 0
+        self.memo_hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        if path:
+            self._load()
+
+    def peek(self, text: str) -> str:
+        """
+        Memoized ``place_id:`` key for ``text`` without calling upstream, else ``text`` as given
+        """
+        place = self._entries.get(canonicalize_place(text))
+        return place.key if place and place.key.startswith("place_id:") else text
+
+    async def resolve(self, text: str, client: GoogleMapsClient) -> ResolvedPlace:
+        query = canonicalize_place(text)
+        self.lookups += 1
+        place = self._entries.get(query)
+        if place is not None:
+            self.memo_hits += 1
+            self._entries.move_to_end(query)
+            return place
+        place, shared = await self._coalescer.run(query, lambda: self._fetch(query, client))
+        if shared:
+            self.coalesced += 1
+        return place
+
+    async def _fetch(self, query: str, client: GoogleMapsClient) -> ResolvedPlace:
+        self.upstream_calls += 1
+        place, definitive = await self._geocode(query, client)
+        if definitive:
+            self._store(place)
+        return place
+
+    async def _geocode(self, query: str, client: GoogleMapsClient) -> tuple[ResolvedPlace, bool]:
+        data = await client.geocode(query)
+        status = data.get("status")
+        results = data.get("results", [])
+        if status != "OK" or not results:
+            # Nothing to converge on; the canonical string is still a stable key.
+            # Quota and auth errors are not definitive, so the next request retries.
+            return ResolvedPlace(query=query, key=query), status in CACHEABLE_STATUSES
+        top = results[0]
+        location = top.get("geometry", {}).get("location", {})
+        place_id = top.get("place_id")
+        return ResolvedPlace(
+            query=query,
+            key=f"place_id:{place_id}" if place_id else query,
+            place_id=place_id,
+            lat=location.get("lat"),
+            lng=location.get("lng"),
+            formatted_address=top.get("formatted_address"),
+        ), True
+
+    def _store(self, place: ResolvedPlace) -> None:
+        self._entries[place.query] = place
+        self._entries.move_to_end(place.query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self.path:
+            self._dirty = True
+            if self._save_handle is None:
+                self._save_handle = asyncio.get_running_loop().call_later(_SAVE_DELAY_SECONDS, self._start_save)
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        self._save_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """
+        Save pending entries now, off the event loop
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        entries = list(self._entries.values())
+        try:
+            await asyncio.to_thread(self._save, entries)
+        except OSError:
+            # Keep the entries in memory and try again on the next save
+            self._dirty = True
+
+    def _read_file(self) -> List[ResolvedPlace]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(data, list):
+            return []
+        places = []
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                places.append(ResolvedPlace(**entry))
+            except (TypeError, ValueError):
+                # pydantic's ValidationError is a ValueError
+                continue
+        return places
+
+    def _load(self) -> None:
+        for place in self._read_file()[-self.max_entries:]:
+            self._entries[place.query] = place
+
+    def _save(self, entries: List[ResolvedPlace]) -> None:
+        # Merge with what other workers saved so the last writer doesn't drop their entries
+        lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.lockf(lock_fd, fcntl.LOCK_EX)
+            merged: OrderedDict[str, ResolvedPlace] = OrderedDict((p.query, p) for p in self._read_file())
+            for place in entries:
+                merged.pop(place.query, None)
+                merged[place.query] = place
+            places = list(merged.values())[-self.max_entries:]
+            # Write-then-rename so readers never see a half-written file
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump([place.model_dump() for place in places], f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        finally:
+            os.close(lock_fd)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "lookups": self.lookups,
+            "memo_hits": self.memo_hits,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "entries": len(self._entries),
+            "distinct_keys": len({place.key for place in self._entries.values()}),
+            # Share of lookups that did not need their own geocode call
+            "dedup_ratio": round(1 - self.upstream_calls / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+class RouteMemo:
+    """
+    Short-lived LRU memo of directions responses.
+
+    Keyed on canonical ``(origin key, destination key, mode)`` so requests
+    that resolve to the same places reuse one upstream call, including
+    concurrent ones. Per worker; the shared Maps cache (MAPS_CACHE_PATH)
+    covers reuse across workers.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 300) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Tuple[str, str, Optional[str]], Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._coalescer = _Coalescer()
+        self.lookups = 0
+        self.memo_hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    async def directions(self, origin: str, destination: str, mode: str | None, client: GoogleMapsClient) -> Dict[str, Any]:
+        key = (origin, destination, mode)
+        self.lookups += 1
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.memo_hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+        data, shared = await self._coalescer.run(key, lambda: self._fetch(key, client))
+        if shared:
+            self.coalesced += 1
+        return data
+
+    async def _fetch(self, key: Tuple[str, str, Optional[str]], client: GoogleMapsClient) -> Dict[str, Any]:
+        self.upstream_calls += 1
+        data = await client.directions(*key)
+        if data.get("status") in CACHEABLE_STATUSES:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "memo_hits": self.memo_hits,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "entries": len(self._entries),
+            "dedup_ratio": round(1 - self.upstream_calls / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_route_memo() -> RouteMemo:
+    settings = get_settings()
+    return RouteMemo(settings.route_memo_entries, settings.route_memo_ttl_seconds)
+
+
+@lru_cache
+def get_geocode_memo() -> GeocodeMemo:
+    settings = get_settings()
+    return GeocodeMemo(settings.geocode_memo_entries, settings.geocode_memo_path)
@@ -1,42 +1,61 @@
 from __future__ import annotations
+import asyncio
 import httpx
+import json
 from typing import Any, Dict
 from .config import get_settings
+from .shared_cache import SharedMapsCache, get_maps_cache
 
 _GOOGLE_BASE = "https://maps.googleapis.com/maps/api"
+# Only successful lookups are cached; quota and auth errors must be retried upstream
+CACHEABLE_STATUSES = {"OK", "ZERO_RESULTS"}
 
 class GoogleMapsClient:
-    def __init__(self, api_key: str | None = None) -> None:
+    def __init__(self, api_key: str | None = None, cache: SharedMapsCache | None = None) -> None:
         settings = get_settings()
         self.api_key = api_key or settings.google_maps_api_key
         self._client = httpx.AsyncClient(base_url=_GOOGLE_BASE, timeout=15)
+        self._cache = cache if cache is not None else get_maps_cache()
 
     async def close(self) -> None:
         await self._client.aclose()
 
+    async def _get_json(self, path: str, params: Dict[str, str]) -> Dict[str, Any]:
+        # The API key is left out of the cache key so it never lands in the shared file
+        cache_key = json.dumps([path, sorted((k, v) for k, v in params.items() if k != "key")], ensure_ascii=False)
+        if self._cache is not None:
+            # Cache calls can wait on another worker's file lock; keep them off the event loop
+            cached = await asyncio.to_thread(self._cache.get, cache_key)
+            if cached is not None:
+                return cached
+        r = await self._client.get(path, params=params)
+        r.raise_for_status()
+        data = r.json()
+        if self._cache is not None and data.get("status") in CACHEABLE_STATUSES:
+            await asyncio.to_thread(self._cache.set, cache_key, data)
+        return data
+
     async def text_search(self, query: str, location: str | None = None, radius: int | None = None) -> Dict[str, Any]:
         params = {"query": query, "key": self.api_key}
         if location:
             params["location"] = location
         if radius:
             params["radius"] = str(radius)
-        r = await self._client.get("/place/textsearch/json", params=params)
-        r.raise_for_status()
-        return r.json()
+        return await self._get_json("/place/textsearch/json", params)
 
     async def place_details(self, place_id: str) -> Dict[str, Any]:
         params = {"place_id": place_id, "key": self.api_key}
-        r = await self._client.get("/place/details/json", params=params)
-        r.raise_for_status()
-        return r.json()
+        return await self._get_json("/place/details/json", params)
+
+    async def geocode(self, address: str) -> Dict[str, Any]:
+        params = {"address": address, "key": self.api_key}
+        return await self._get_json("/geocode/json", params)
 
     async def directions(self, origin: str, destination: str, mode: str | None = None) -> Dict[str, Any]:
         params = {"origin": origin, "destination": destination, "key": self.api_key}
         if mode:
             params["mode"] = mode
-        r = await self._client.get("/directions/json", params=params)
-        r.raise_for_status()
-        return r.json()
+        return await self._get_json("/directions/json", params)
 
     @staticmethod
     def embed_place_url(place_id: str, api_key: str) -> str:
@@ -6,6 +6,8 @@ from slowapi.middleware import SlowAPIMiddleware
 from .config import get_settings
 from .rate_limit import limiter
 from .routes import router
+from .geocode_memo import get_geocode_memo
+from .shared_cache import get_maps_cache
 from fastapi.responses import JSONResponse
 from fastapi import Request
 
@@ -31,6 +33,15 @@ async def health():
 
 app.include_router(router, prefix="/api")
 
+@app.on_event("startup")
+async def open_maps_cache():
+    # Open (or reject) the shared cache file once, before serving requests
+    get_maps_cache()
+
+@app.on_event("shutdown")
+async def flush_geocode_memo():
+    await get_geocode_memo().flush()
+
 # Serve Open WebUI tool definitions (OpenAI-style function/tool schema)
 @app.get("/openwebui-tools.json")
 async def openwebui_tools():
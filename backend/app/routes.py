@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Request
-from .schemas import SearchRequest, PlaceDetailsRequest, DirectionsRequest, SearchResponse, DetailsResponse, DirectionsResponse, EmbedPlaceResponse, EmbedDirectionsResponse
+from .schemas import SearchRequest, PlaceDetailsRequest, DirectionsRequest, SearchResponse, DetailsResponse, DirectionsResponse, EmbedPlaceResponse, EmbedDirectionsResponse, PlaceCard, DEFAULT_PLACE_CARDS, OptionalTravelMode
 from .google_maps import GoogleMapsClient
 from .config import get_settings
 from .rate_limit import limiter
 from fastapi import HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import httpx
 import json
+import asyncio
 
 from .llm_client import OllamaClient
+from .geocode_memo import canonicalize_mode, get_geocode_memo, get_route_memo
 
 router = APIRouter()
 
@@ -26,13 +28,70 @@ class LLMChatResponse(BaseModel):
     response: str
     map_data: Dict[str, Any] | None = None
 
+# Composite response helpers: build embed/external URLs server-side so the
+# frontend can render a map from a single round trip.
+def _place_external_url(place_id: str) -> str:
+    return f"https://maps.google.com/?q=place_id:{place_id}"
+
+def _directions_external_url(origin: str, destination: str, mode: str | None = None) -> str:
+    url = f"https://www.google.com/maps/dir/?api=1&origin={origin}&destination={destination}"
+    if mode:
+        url += f"&travelmode={mode}"
+    return url
+
+def _located_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Results without a place_id cannot be embedded, so they are neither shown nor counted
+    return [place for place in results if place.get("place_id")]
+
+def _place_cards(results: List[Dict[str, Any]], api_key: str, top_n: int) -> List[PlaceCard]:
+    cards = []
+    for place in _located_results(results):
+        place_id = place["place_id"]
+        cards.append(PlaceCard(
+            place_id=place_id,
+            name=place.get("name"),
+            address=place.get("formatted_address"),
+            rating=place.get("rating"),
+            embed_url=GoogleMapsClient.embed_place_url(place_id, api_key),
+            external_url=_place_external_url(place_id),
+        ))
+        if len(cards) >= top_n:
+            break
+    return cards
+
+def _place_map_data(cards: List[PlaceCard], total_results: int) -> Optional[Dict[str, Any]]:
+    if not cards:
+        return None
+    top = cards[0]
+    return {
+        "type": "place",
+        "embed_url": top.embed_url,
+        "external_url": top.external_url,
+        "place": {
+            "name": top.name,
+            "address": top.address,
+            "rating": top.rating
+        },
+        "places": [card.model_dump() for card in cards],
+        "total_results": total_results
+    }
+
 @router.post("/search", response_model=SearchResponse)
 @limiter.limit("10/10 seconds")
 async def search_places(request: Request, payload: SearchRequest) -> SearchResponse:
     client = GoogleMapsClient()
     try:
         data = await client.text_search(payload.query, payload.location, payload.radius)
-        return SearchResponse(raw=data)
+        if not payload.composite:
+            return SearchResponse(raw=data)
+        results = _located_results(data.get("results", []))
+        cards = _place_cards(results, client.api_key, payload.top_n)
+        return SearchResponse(
+            raw=data,
+            total_results=len(results),
+            places=cards,
+            map_data=_place_map_data(cards, len(results))
+        )
     finally:
         await client.close()
 
@@ -50,8 +109,14 @@ async def place_details(request: Request, payload: PlaceDetailsRequest) -> Detai
 @limiter.limit("30/minute")
 async def get_directions(request: Request, payload: DirectionsRequest) -> DirectionsResponse:
     client = GoogleMapsClient()
+    memo = get_geocode_memo()
     try:
-        data = await client.directions(payload.origin, payload.destination, payload.mode)
+        # Resolve free text to canonical place_id keys so equivalent spellings share a route cache entry
+        origin, destination = await asyncio.gather(
+            memo.resolve(payload.origin, client),
+            memo.resolve(payload.destination, client)
+        )
+        data = await get_route_memo().directions(origin.key, destination.key, payload.mode, client)
         return DirectionsResponse(raw=data)
     finally:
         await client.close()
@@ -60,16 +125,21 @@ async def get_directions(request: Request, payload: DirectionsRequest) -> Direct
 async def embed_place(place_id: str) -> EmbedPlaceResponse:
     settings = get_settings()
     url = GoogleMapsClient.embed_place_url(place_id, settings.google_maps_api_key)
-    return EmbedPlaceResponse(embed_url=url, external_url=f"https://maps.google.com/?q=place_id:{place_id}")
+    return EmbedPlaceResponse(embed_url=url, external_url=_place_external_url(place_id))
 
 @router.get("/embed/directions", response_model=EmbedDirectionsResponse)
-async def embed_directions(origin: str, destination: str, mode: str | None = None) -> EmbedDirectionsResponse:
+async def embed_directions(origin: str, destination: str, mode: OptionalTravelMode = None) -> EmbedDirectionsResponse:
     settings = get_settings()
-    url = GoogleMapsClient.embed_directions_url(origin, destination, settings.google_maps_api_key, mode)
-    ext = f"https://www.google.com/maps/dir/?api=1&origin={origin}&destination={destination}"
-    if mode:
-        ext += f"&travelmode={mode}"
-    return EmbedDirectionsResponse(embed_url=url, external_url=ext)
+    memo = get_geocode_memo()
+    url = GoogleMapsClient.embed_directions_url(memo.peek(origin), memo.peek(destination), settings.google_maps_api_key, mode)
+    return EmbedDirectionsResponse(embed_url=url, external_url=_directions_external_url(origin, destination, mode))
+
+@router.get("/geocode/stats")
+async def geocode_stats() -> Dict[str, Any]:
+    """
+    Geocode and route memo counters for the worker that serves this request
+    """
+    return {**get_geocode_memo().stats(), "routes": get_route_memo().stats()}
 
 # Tool-call friendly wrappers (optional): allow Open WebUI to call via name mapping
 @router.post("/tool/search_places", response_model=SearchResponse)
@@ -81,7 +151,7 @@ async def tool_embed_place(place_id: str) -> EmbedPlaceResponse:
     return await embed_place(place_id)
 
 @router.get("/tool/embed_directions", response_model=EmbedDirectionsResponse)
-async def tool_embed_directions(origin: str, destination: str, mode: str | None = None) -> EmbedDirectionsResponse:
+async def tool_embed_directions(origin: str, destination: str, mode: OptionalTravelMode = None) -> EmbedDirectionsResponse:
     return await embed_directions(origin, destination, mode)
 
 # LLM Chat endpoint
@@ -130,14 +200,13 @@ async def llm_chat(request: Request, payload: LLMChatRequest) -> LLMChatResponse
             if match:
                 origin = match.group(1).strip()
                 destination = match.group(2).strip()
-                mode = match.group(3).lower() if match.group(3) else "driving"
+                mode = canonicalize_mode(match.group(3)) or "driving"
                 
-                # Get directions embed
+                # Get directions embed, using memoized place_id keys where already resolved
                 settings = get_settings()
-                embed_url = GoogleMapsClient.embed_directions_url(origin, destination, settings.google_maps_api_key, mode)
-                external_url = f"https://www.google.com/maps/dir/?api=1&origin={origin}&destination={destination}"
-                if mode:
-                    external_url += f"&travelmode={mode}"
+                memo = get_geocode_memo()
+                embed_url = GoogleMapsClient.embed_directions_url(memo.peek(origin), memo.peek(destination), settings.google_maps_api_key, mode)
+                external_url = _directions_external_url(origin, destination, mode)
                 
                 map_data = {
                     "type": "directions",
@@ -154,36 +223,21 @@ async def llm_chat(request: Request, payload: LLMChatRequest) -> LLMChatResponse
         elif any(keyword in user_query_lower for keyword in ["find", "show", "where", "restaurant", "coffee", "shop", "place"]):
             # Search for places
             search_data = await maps_client.text_search(payload.message, None, 5000)
-            results = search_data.get("results", [])
+            results = _located_results(search_data.get("results", []))
             
-            if results:
-                top_place = results[0]
-                place_id = top_place.get("place_id")
+            cards = _place_cards(results, maps_client.api_key, DEFAULT_PLACE_CARDS)
+            if cards:
+                top_place = cards[0]
+                map_data = _place_map_data(cards, len(results))
+                
+                # Enhance LLM response with place details
+                place_info = f"\n\n**{top_place.name}**\n"
+                if top_place.address:
+                    place_info += f"📍 {top_place.address}\n"
+                if top_place.rating:
+                    place_info += f"⭐ Rating: {top_place.rating}/5\n"
                 
-                if place_id:
-                    settings = get_settings()
-                    embed_url = GoogleMapsClient.embed_place_url(place_id, settings.google_maps_api_key)
-                    external_url = f"https://maps.google.com/?q=place_id:{place_id}"
-                    
-                    map_data = {
-                        "type": "place",
-                        "embed_url": embed_url,
-                        "external_url": external_url,
-                        "place": {
-                            "name": top_place.get("name"),
-                            "address": top_place.get("formatted_address"),
-                            "rating": top_place.get("rating")
-                        }
-                    }
-                    
-                    # Enhance LLM response with place details
-                    place_info = f"\n\n**{top_place.get('name')}**\n"
-                    if top_place.get('formatted_address'):
-                        place_info += f"📍 {top_place.get('formatted_address')}\n"
-                    if top_place.get('rating'):
-                        place_info += f"⭐ Rating: {top_place.get('rating')}/5\n"
-                    
-                    assistant_message += place_info + "\nI've shown it on the map. You can also open it in Google Maps using the link provided."
+                assistant_message += place_info + "\nI've shown it on the map. You can also open it in Google Maps using the link provided."
         
         return LLMChatResponse(
             response=assistant_message,
@@ -1,10 +1,29 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Any, Dict
+from pydantic import BaseModel, Field, BeforeValidator
+from typing import Optional, Any, Dict, List, Literal, Annotated
+
+TravelMode = Literal["driving", "walking", "bicycling", "transit"]
+
+def _normalize_mode(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    value = value.strip().lower()
+    # Blank values and unfilled action templates ("{{mode}}") mean no mode
+    if not value or (value.startswith("{{") and value.endswith("}}")):
+        return None
+    return value
+
+# Case/whitespace-insensitive travel mode; unknown values are still rejected
+OptionalTravelMode = Annotated[Optional[TravelMode], BeforeValidator(_normalize_mode)]
+
+# Place cards returned inline by composite search and chat responses
+DEFAULT_PLACE_CARDS = 4
 
 class SearchRequest(BaseModel):
     query: str = Field(min_length=1, max_length=200)
     location: Optional[str] = Field(default=None, description="lat,lng")
     radius: Optional[int] = Field(default=None, ge=1, le=50000)
+    composite: bool = Field(default=False, description="Inline embed URLs and place cards in the response")
+    top_n: int = Field(default=DEFAULT_PLACE_CARDS, ge=1, le=10, description="Place cards returned in composite mode")
 
 class PlaceDetailsRequest(BaseModel):
     place_id: str = Field(min_length=5)
@@ -12,7 +31,7 @@ class PlaceDetailsRequest(BaseModel):
 class DirectionsRequest(BaseModel):
     origin: str = Field(min_length=1)
     destination: str = Field(min_length=1)
-    mode: Optional[str] = Field(default=None)
+    mode: OptionalTravelMode = Field(default=None)
 
 class EmbedPlaceResponse(BaseModel):
     embed_url: str
@@ -22,8 +41,19 @@ class EmbedDirectionsResponse(BaseModel):
     embed_url: str
     external_url: str
 
+class PlaceCard(BaseModel):
+    place_id: str
+    name: Optional[str] = None
+    address: Optional[str] = None
+    rating: Optional[float] = None
+    embed_url: str
+    external_url: str
+
 class SearchResponse(BaseModel):
     raw: Dict[str, Any]
+    total_results: Optional[int] = Field(default=None, description="Results that have a place_id (composite mode)")
+    places: Optional[List[PlaceCard]] = None
+    map_data: Optional[Dict[str, Any]] = None
 
 class DetailsResponse(BaseModel):
     raw: Dict[str, Any]
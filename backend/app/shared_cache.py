@@ -0,0 +1,250 @@
+"""
+Cross-worker cache for Google Maps responses backed by a memory-mapped file
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts run without the shared cache
+    fcntl = None
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"LMAC"
+_VERSION = 1
+_PROBE = 8
+
+# magic, version, shard count, slots per shard, arena bytes per shard
+_HEADER = struct.Struct("<4sIIII")
+_HEADER_SIZE = 64
+# write head: logical (monotonic) byte position in the shard's ring arena
+_SHARD_HEADER = struct.Struct("<Q")
+# key hash, logical position, expires at, last access, record length
+_SLOT = struct.Struct("<QQddI4x")
+# key length, value length
+_RECORD = struct.Struct("<II")
+
+
+class SharedMapsCache:
+    """
+    Fixed-size cache shared by every worker process that maps the same file.
+
+    The file is split into shards, each guarded by a POSIX byte-range lock
+    (shared for reads, exclusive for writes) plus a per-shard mutex for
+    threads in the same worker. A shard holds a small open
+    addressing slot table and a ring arena of zlib-compressed JSON records.
+    The ring bounds memory use: new records overwrite the oldest bytes, and
+    entries read while in the older half of the ring are re-appended so hot
+    keys survive (approximate LRU). When a slot probe window is full the
+    least recently used slot is reused. Records expire after ``ttl_seconds``.
+
+    The layout is part of the file name, so workers started with different
+    settings (e.g. during a rolling reload) use separate files instead of
+    resizing one that is still mapped. ``get``/``set`` block on file locks;
+    call them from a worker thread, not the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: int, shards: int = 16) -> None:
+        if fcntl is None:
+            raise RuntimeError("SharedMapsCache requires POSIX file locking (fcntl)")
+        self.ttl_seconds = ttl_seconds
+        self.shards = shards
+        shard_bytes = max_bytes // shards
+        # Assume ~4 KiB per compressed record to size the slot table
+        self.slots = max(64, shard_bytes // 4096)
+        self.arena_bytes = shard_bytes - _SHARD_HEADER.size - self.slots * _SLOT.size
+        if self.arena_bytes < 4096:
+            raise ValueError("max_bytes is too small for the requested number of shards")
+        self._shard_size = _SHARD_HEADER.size + self.slots * _SLOT.size + self.arena_bytes
+        self._size = _HEADER_SIZE + shards * self._shard_size
+        self.path = f"{path}.v{_VERSION}-{shards}x{self.slots}x{self.arena_bytes}"
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._init_file()
+        self._mm = mmap.mmap(self._fd, self._size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+
+    def _init_file(self) -> None:
+        # Whole-file lock so concurrently starting workers agree on one layout
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            expected = _HEADER.pack(_MAGIC, _VERSION, self.shards, self.slots, self.arena_bytes)
+            size = os.fstat(self._fd).st_size
+            if size == 0:
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, expected, 0)
+            elif size == self._size and os.pread(self._fd, _HEADER.size, 0) == bytes(_HEADER.size):
+                # A worker died between ftruncate and pwrite; the header is written before
+                # the init lock is released, so nobody can be using this file yet
+                os.pwrite(self._fd, expected, 0)
+            # Other workers may have a mismatched file mapped; resizing it under them would SIGBUS
+            valid = os.fstat(self._fd).st_size == self._size and os.pread(self._fd, _HEADER.size, 0) == expected
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        if not valid:
+            os.close(self._fd)
+            raise RuntimeError(f"Maps cache file {self.path} has an unexpected layout; remove it and restart")
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # Stable across processes, unlike hash(); 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+    def _shard_offset(self, shard: int) -> int:
+        return _HEADER_SIZE + shard * self._shard_size
+
+    def _slot_offset(self, shard: int, slot: int) -> int:
+        return self._shard_offset(shard) + _SHARD_HEADER.size + slot * _SLOT.size
+
+    def _arena_offset(self, shard: int) -> int:
+        return self._shard_offset(shard) + _SHARD_HEADER.size + self.slots * _SLOT.size
+
+    def _probe(self, key_hash: int) -> tuple[int, list[int]]:
+        shard = key_hash % self.shards
+        start = (key_hash // self.shards) % self.slots
+        return shard, [(start + i) % self.slots for i in range(_PROBE)]
+
+    @contextmanager
+    def _locked(self, shard: int, op: int) -> Iterator[None]:
+        # fcntl locks are per process, so threads in one worker also need the mutex
+        with self._locks[shard]:
+            fcntl.lockf(self._fd, op, 1, shard + 1)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, shard + 1)
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        key_bytes = key.encode("utf-8")
+        key_hash = self._hash(key_bytes)
+        shard, probe = self._probe(key_hash)
+        now = time.time()
+        value = None
+        promote = False
+        corrupt = False
+        remaining = 0.0
+        with self._locked(shard, fcntl.LOCK_SH):
+            mm = self._mm
+            (head,) = _SHARD_HEADER.unpack_from(mm, self._shard_offset(shard))
+            for slot in probe:
+                slot_off = self._slot_offset(shard, slot)
+                slot_hash, pos, expires_at, _, length = _SLOT.unpack_from(mm, slot_off)
+                if slot_hash != key_hash:
+                    continue
+                if expires_at < now or head > pos + self.arena_bytes:
+                    return None
+                rec_off = self._arena_offset(shard) + pos % self.arena_bytes
+                key_len, value_len = _RECORD.unpack_from(mm, rec_off)
+                if key_len != len(key_bytes) or length != _RECORD.size + key_len + value_len:
+                    corrupt = True
+                    break
+                data_off = rec_off + _RECORD.size
+                view = memoryview(mm)
+                try:
+                    if view[data_off:data_off + key_len] != key_bytes:
+                        return None
+                    # Decompress straight out of the mapping, no intermediate copy
+                    value = json.loads(zlib.decompress(view[data_off + key_len:data_off + key_len + value_len]))
+                except (zlib.error, ValueError):
+                    corrupt = True
+                    break
+                finally:
+                    view.release()
+                # Racy float store under a shared lock; last writer wins, which is fine for LRU
+                struct.pack_into("<d", mm, slot_off + 24, now)
+                promote = head - pos > self.arena_bytes // 2
+                remaining = expires_at - now
+                break
+        if corrupt:
+            # A damaged record must never fail the request; drop it and report a miss
+            self._clear(shard, slot, key_hash, pos)
+            return None
+        if promote and value is not None:
+            self.set(key, value, ttl_seconds=max(1, int(remaining)))
+        return value
+
+    def _clear(self, shard: int, slot: int, key_hash: int, pos: int) -> None:
+        with self._locked(shard, fcntl.LOCK_EX):
+            slot_off = self._slot_offset(shard, slot)
+            slot_hash, slot_pos, _, _, _ = _SLOT.unpack_from(self._mm, slot_off)
+            # Only clear it if no other writer replaced the entry meanwhile
+            if slot_hash == key_hash and slot_pos == pos:
+                _SLOT.pack_into(self._mm, slot_off, 0, 0, 0.0, 0.0, 0)
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int | None = None) -> bool:
+        key_bytes = key.encode("utf-8")
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        length = _RECORD.size + len(key_bytes) + len(payload)
+        if length > self.arena_bytes // 4:
+            return False
+        key_hash = self._hash(key_bytes)
+        shard, probe = self._probe(key_hash)
+        now = time.time()
+        expires_at = now + (ttl_seconds or self.ttl_seconds)
+        with self._locked(shard, fcntl.LOCK_EX):
+            mm = self._mm
+            shard_off = self._shard_offset(shard)
+            (head,) = _SHARD_HEADER.unpack_from(mm, shard_off)
+
+            target = None
+            oldest = None
+            for slot in probe:
+                slot_hash, pos, slot_expires, last_access, _ = _SLOT.unpack_from(mm, self._slot_offset(shard, slot))
+                if slot_hash == key_hash:
+                    target = slot
+                    break
+                if target is None and (slot_hash == 0 or slot_expires < now or head > pos + self.arena_bytes):
+                    target = slot
+                if oldest is None or last_access < oldest[1]:
+                    oldest = (slot, last_access)
+            if target is None:
+                target = oldest[0]
+
+            # Records never straddle the end of the ring; skip to the start instead
+            physical = head % self.arena_bytes
+            if physical + length > self.arena_bytes:
+                head += self.arena_bytes - physical
+                physical = 0
+            # Advance the head before touching the arena: if this worker dies
+            # mid-write, the overwritten records already fail the head check
+            _SHARD_HEADER.pack_into(mm, shard_off, head + length)
+            rec_off = self._arena_offset(shard) + physical
+            _RECORD.pack_into(mm, rec_off, len(key_bytes), len(payload))
+            data_off = rec_off + _RECORD.size
+            mm[data_off:data_off + len(key_bytes)] = key_bytes
+            mm[data_off + len(key_bytes):data_off + length - _RECORD.size] = payload
+            _SLOT.pack_into(mm, self._slot_offset(shard, target), key_hash, head, expires_at, now, length)
+        return True
+
+
+@lru_cache
+def get_maps_cache() -> SharedMapsCache | None:
+    """
+    Process-wide cache, opened once at app startup; None when disabled or unusable
+    """
+    settings = get_settings()
+    if not settings.maps_cache_path or fcntl is None:
+        return None
+    try:
+        return SharedMapsCache(settings.maps_cache_path, settings.maps_cache_bytes, settings.maps_cache_ttl_seconds)
+    except (OSError, RuntimeError, ValueError) as exc:
+        # Returning (not raising) lets lru_cache remember the failure instead of retrying per request
+        logger.warning("Shared Maps cache disabled: %s", exc)
+        return None
@@ -0,0 +1,4 @@
+import os
+
+# Settings are read on import; tests never reach Google
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "test-key-0123456789")
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import geocode_memo
+from backend.app.geocode_memo import RouteMemo
+from backend.app.google_maps import GoogleMapsClient
+from backend.app.main import app
+from backend.app.rate_limit import limiter
+
+PLACE_IDS = {"seoul": "SEOUL", "seoul, south korea": "SEOUL", "서울": "SEOUL", "busan": "BUSAN"}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    async def fake_get_json(self, path, params):
+        calls.append(path)
+        if path == "/geocode/json":
+            place_id = PLACE_IDS[params["address"]]
+            return {"status": "OK", "results": [{"place_id": place_id, "geometry": {"location": {"lat": 1.0, "lng": 2.0}}}]}
+        return {"status": "OK", "routes": [{"summary": f"{params['origin']}->{params['destination']}"}], "mode": params.get("mode")}
+
+    monkeypatch.setattr(GoogleMapsClient, "_get_json", fake_get_json)
+    monkeypatch.setattr(limiter, "enabled", False)
+    geocode_memo.get_geocode_memo.cache_clear()
+    geocode_memo.get_route_memo.cache_clear()
+    yield calls
+    geocode_memo.get_geocode_memo.cache_clear()
+    geocode_memo.get_route_memo.cache_clear()
+
+
+@pytest.fixture
+def client(upstream):
+    return TestClient(app)
+
+
+def test_repeated_directions_reuse_geocodes_and_route(client, upstream):
+    for origin in ["Seoul", "seoul ", "Seoul, South Korea", "서울"]:
+        r = client.post("/api/directions", json={"origin": origin, "destination": "Busan"})
+        assert r.status_code == 200
+        assert r.json()["raw"]["routes"][0]["summary"] == "place_id:SEOUL->place_id:BUSAN"
+    # One geocode per distinct canonical string, one directions call for all four
+    assert upstream.count("/geocode/json") == 4
+    assert upstream.count("/directions/json") == 1
+    stats = client.get("/api/geocode/stats").json()
+    assert stats["routes"]["memo_hits"] == 3
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("", None),
+    ("Driving", "driving"),
+    (" WALKING ", "walking"),
+    ("{{mode}}", None),
+])
+def test_embed_directions_normalizes_mode(client, mode, expected):
+    r = client.get("/api/embed/directions", params={"origin": "Seoul", "destination": "Busan", "mode": mode})
+    assert r.status_code == 200
+    embed_url = r.json()["embed_url"]
+    if expected:
+        assert embed_url.endswith(f"&mode={expected}")
+    else:
+        assert "&mode=" not in embed_url
+
+
+def test_unknown_mode_is_rejected(client):
+    r = client.get("/api/embed/directions", params={"origin": "Seoul", "destination": "Busan", "mode": "bike"})
+    assert r.status_code == 422
+    r = client.post("/api/directions", json={"origin": "Seoul", "destination": "Busan", "mode": "bike"})
+    assert r.status_code == 422
+
+
+def test_directions_mode_is_normalized(client, upstream):
+    r = client.post("/api/directions", json={"origin": "Seoul", "destination": "Busan", "mode": " Transit"})
+    assert r.status_code == 200
+    assert r.json()["raw"]["mode"] == "transit"
+
+
+def test_embed_uses_place_id_only_once_resolved(client):
+    params = {"origin": "Seoul", "destination": "Somewhere New"}
+    before = client.get("/api/embed/directions", params=params).json()["embed_url"]
+    assert "origin=Seoul&destination=Somewhere New" in before
+
+    client.post("/api/directions", json={"origin": "Seoul", "destination": "Busan"})
+    after = client.get("/api/embed/directions", params=params).json()["embed_url"]
+    # Unresolved text keeps the user's own casing
+    assert "origin=place_id:SEOUL&destination=Somewhere New" in after
+
+
+def test_route_memo_coalesces_concurrent_requests():
+    class StubClient:
+        calls = 0
+
+        async def directions(self, origin, destination, mode=None):
+            StubClient.calls += 1
+            await asyncio.sleep(0.01)
+            return {"status": "OK", "routes": []}
+
+    async def run():
+        memo = RouteMemo()
+        await asyncio.gather(*[memo.directions("place_id:A", "place_id:B", None, StubClient()) for _ in range(3)])
+        return memo
+
+    memo = asyncio.run(run())
+    assert StubClient.calls == 1
+    assert memo.stats()["coalesced"] == 2
+
+
+def test_route_memo_does_not_keep_errors():
+    class StubClient:
+        calls = 0
+
+        async def directions(self, origin, destination, mode=None):
+            StubClient.calls += 1
+            return {"status": "OVER_QUERY_LIMIT"}
+
+    async def run():
+        memo = RouteMemo()
+        await memo.directions("a", "b", None, StubClient())
+        await memo.directions("a", "b", None, StubClient())
+
+    asyncio.run(run())
+    assert StubClient.calls == 2
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.app import geocode_memo
+from backend.app.geocode_memo import GeocodeMemo, canonicalize_place
+
+
+class StubClient:
+    def __init__(self, status: str = "OK", delay: float = 0.0) -> None:
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def geocode(self, address: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.status != "OK":
+            return {"status": self.status, "results": []}
+        return {"status": "OK", "results": [{"place_id": "SEOUL", "geometry": {"location": {"lat": 37.5, "lng": 127.0}}}]}
+
+
+def test_canonicalize_place():
+    assert canonicalize_place("  Seoul ") == canonicalize_place("SEOUL.") == "seoul"
+    assert canonicalize_place("Seoul ,South  Korea") == "seoul, south korea"
+
+
+def test_memo_hit_skips_upstream():
+    async def run():
+        memo, client = GeocodeMemo(), StubClient()
+        first = await memo.resolve("Seoul", client)
+        second = await memo.resolve("seoul ", client)
+        return memo, client, first, second
+
+    memo, client, first, second = asyncio.run(run())
+    assert first.key == second.key == "place_id:SEOUL"
+    assert client.calls == 1
+    assert memo.stats()["dedup_ratio"] == 0.5
+
+
+@pytest.mark.parametrize("status", ["OVER_QUERY_LIMIT", "REQUEST_DENIED", "UNKNOWN_ERROR"])
+def test_transient_failures_are_not_memoized(status):
+    async def run():
+        memo, client = GeocodeMemo(), StubClient(status)
+        failed = await memo.resolve("Seoul", client)
+        client.status = "OK"
+        recovered = await memo.resolve("seoul ", client)
+        return client, failed, recovered
+
+    client, failed, recovered = asyncio.run(run())
+    assert failed.key == "seoul"
+    assert recovered.key == "place_id:SEOUL"
+    assert client.calls == 2
+
+
+def test_zero_results_is_memoized():
+    async def run():
+        memo, client = GeocodeMemo(), StubClient("ZERO_RESULTS")
+        await memo.resolve("nowhere", client)
+        await memo.resolve("Nowhere", client)
+        return client
+
+    assert asyncio.run(run()).calls == 1
+
+
+def test_concurrent_resolves_are_coalesced():
+    async def run():
+        memo, client = GeocodeMemo(), StubClient(delay=0.01)
+        places = await asyncio.gather(*[memo.resolve("Seoul", client) for _ in range(5)])
+        return memo, client, places
+
+    memo, client, places = asyncio.run(run())
+    assert client.calls == 1
+    assert {place.key for place in places} == {"place_id:SEOUL"}
+    assert memo.stats()["coalesced"] == 4
+
+
+def test_cancelled_owner_does_not_fail_waiters():
+    async def run():
+        memo, client = GeocodeMemo(), StubClient(delay=0.05)
+        owner = asyncio.create_task(memo.resolve("Seoul", client))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(memo.resolve("Seoul", client))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return client, await waiter
+
+    client, place = asyncio.run(run())
+    assert place.key == "place_id:SEOUL"
+    # The waiter retried with its own geocode call
+    assert client.calls == 2
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    json.dumps({"query": "seoul", "key": "place_id:SEOUL"}),
+    json.dumps([{"query": "seoul"}, "junk", {"query": "busan", "key": "place_id:BUSAN"}]),
+])
+def test_load_skips_malformed_files(tmp_path, content):
+    path = tmp_path / "memo.json"
+    path.write_text(content, encoding="utf-8")
+    memo = GeocodeMemo(path=str(path))
+    assert memo.peek("Seoul") == "Seoul"
+    assert memo.peek("Busan") == ("place_id:BUSAN" if "busan" in content else "Busan")
+
+
+def test_save_is_debounced_and_merges_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocode_memo, "_SAVE_DELAY_SECONDS", 0.01)
+    path = str(tmp_path / "memo.json")
+
+    async def run():
+        worker_a, worker_b = GeocodeMemo(path=path), GeocodeMemo(path=path)
+        await worker_a.resolve("Seoul", StubClient())
+        await worker_b.resolve("Busan", StubClient("ZERO_RESULTS"))
+        await worker_b.resolve("Incheon", StubClient("ZERO_RESULTS"))
+        await asyncio.sleep(0.05)
+        await worker_a.flush()
+        await worker_b.flush()
+
+    asyncio.run(run())
+    fresh = GeocodeMemo(path=path)
+    assert fresh.peek("seoul") == "place_id:SEOUL"
+    assert fresh.stats()["entries"] == 3
@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import routes
+from backend.app.google_maps import GoogleMapsClient
+from backend.app.main import app
+from backend.app.rate_limit import limiter
+
+RESULTS = [
+    {"place_id": "P1", "name": "Sushi One", "formatted_address": "1 Main St", "rating": 4.6},
+    {"name": "No Id Sushi"},
+    {"place_id": "P2", "name": "Sushi Two", "rating": 4.1},
+    {"place_id": "P3", "name": "Sushi Three"},
+]
+
+
+class StubMapsClient:
+    results = RESULTS
+    embed_place_url = staticmethod(GoogleMapsClient.embed_place_url)
+    embed_directions_url = staticmethod(GoogleMapsClient.embed_directions_url)
+
+    def __init__(self) -> None:
+        self.api_key = "test-key-0123456789"
+
+    async def text_search(self, query, location=None, radius=None):
+        return {"status": "OK", "results": self.results}
+
+    async def close(self) -> None:
+        pass
+
+
+class StubOllamaClient:
+    async def chat(self, model, messages, tools=None):
+        return {"message": {"role": "assistant", "content": "Sure."}}
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(routes, "GoogleMapsClient", StubMapsClient)
+    monkeypatch.setattr(routes, "OllamaClient", StubOllamaClient)
+    monkeypatch.setattr(limiter, "enabled", False)
+    return TestClient(app)
+
+
+def test_search_default_shape_is_raw_only(client):
+    body = client.post("/api/search", json={"query": "sushi"}).json()
+    assert body["raw"]["results"] == RESULTS
+    assert body["places"] is None and body["map_data"] is None and body["total_results"] is None
+
+
+def test_search_composite_respects_top_n_and_skips_missing_place_id(client):
+    body = client.post("/api/search", json={"query": "sushi", "composite": True, "top_n": 2}).json()
+    assert [place["place_id"] for place in body["places"]] == ["P1", "P2"]
+    # The result without a place_id is neither carded nor counted
+    assert body["total_results"] == 3
+    assert body["places"][0]["embed_url"].endswith("q=place_id:P1")
+    assert body["places"][0]["external_url"] == "https://maps.google.com/?q=place_id:P1"
+    assert body["map_data"]["embed_url"] == body["places"][0]["embed_url"]
+    assert body["map_data"]["places"] == body["places"]
+
+
+def test_search_composite_empty_results(client, monkeypatch):
+    monkeypatch.setattr(StubMapsClient, "results", [])
+    body = client.post("/api/search", json={"query": "nothing", "composite": True}).json()
+    assert body["places"] == []
+    assert body["total_results"] == 0
+    assert body["map_data"] is None
+
+
+def test_search_composite_only_results_without_place_id(client, monkeypatch):
+    monkeypatch.setattr(StubMapsClient, "results", [{"name": "No Id"}])
+    body = client.post("/api/search", json={"query": "nothing", "composite": True}).json()
+    assert body["places"] == [] and body["total_results"] == 0 and body["map_data"] is None
+
+
+def test_llm_chat_place_map_data_carries_cards(client):
+    body = client.post("/api/llm/chat", json={"message": "find sushi restaurant"}).json()
+    map_data = body["map_data"]
+    assert map_data["type"] == "place"
+    assert [place["place_id"] for place in map_data["places"]] == ["P1", "P2", "P3"]
+    assert map_data["total_results"] == 3
+    assert "Sushi One" in body["response"]
+
+
+def test_llm_chat_without_results_has_no_map(client, monkeypatch):
+    monkeypatch.setattr(StubMapsClient, "results", [])
+    body = client.post("/api/llm/chat", json={"message": "find sushi restaurant"}).json()
+    assert body["map_data"] is None
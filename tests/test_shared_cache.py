@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app import shared_cache
+from backend.app.shared_cache import SharedMapsCache
+
+
+def _payload(n: int) -> dict:
+    # Random hex barely compresses, so record sizes stay predictable
+    return {"status": "OK", "data": os.urandom(n).hex()}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = SharedMapsCache(str(tmp_path / "cache"), 1024 * 1024, ttl_seconds=60)
+    yield c
+    c.close()
+
+
+def test_round_trip(cache):
+    value = {"status": "OK", "results": [{"name": "서울역", "rating": 4.5}]}
+    assert cache.set("k", value)
+    assert cache.get("k") == value
+    assert cache.get("missing") is None
+
+
+def test_overwrite_same_key(cache):
+    cache.set("k", {"v": 1})
+    cache.set("k", {"v": 2})
+    assert cache.get("k") == {"v": 2}
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    cache.set("k", {"v": 1}, ttl_seconds=5)
+    now = shared_cache.time.time()
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now + 10)
+    assert cache.get("k") is None
+
+
+def test_ring_overwrite_invalidates_old_records(tmp_path):
+    # One shard so every record shares a single ring arena
+    c = SharedMapsCache(str(tmp_path / "ring"), 64 * 1024, ttl_seconds=60, shards=1)
+    size = os.path.getsize(c.path)
+    c.set("first", _payload(2000))
+    shard, probe = c._probe(c._hash(b"first"))
+    for i in range(40):
+        c.set(f"k{i}", _payload(2000))
+
+    (head,) = shared_cache._SHARD_HEADER.unpack_from(c._mm, c._shard_offset(shard))
+    slots = [shared_cache._SLOT.unpack_from(c._mm, c._slot_offset(shard, s)) for s in probe]
+    first = [slot for slot in slots if slot[0] == c._hash(b"first")]
+    # The slot survives, but the ring has wrapped past its bytes
+    assert first and head > first[0][1] + c.arena_bytes
+    assert c.get("first") is None
+    assert c.get("k39") is not None
+    assert os.path.getsize(c.path) == size
+    c.close()
+
+
+def test_damaged_record_is_a_miss(cache):
+    cache.set("k", {"v": 1})
+    shard, probe = cache._probe(cache._hash(b"k"))
+    for slot in probe:
+        slot_hash, pos, _, _, length = shared_cache._SLOT.unpack_from(cache._mm, cache._slot_offset(shard, slot))
+        if slot_hash == cache._hash(b"k"):
+            break
+    rec_off = cache._arena_offset(shard) + pos % cache.arena_bytes
+    value_off = rec_off + shared_cache._RECORD.size + 1
+    cache._mm[value_off:rec_off + length] = b"\x00" * (rec_off + length - value_off)
+
+    assert cache.get("k") is None
+    assert cache.get("k") is None
+    cache.set("k", {"v": 2})
+    assert cache.get("k") == {"v": 2}
+
+
+def test_unexpected_layout_refuses_to_start(tmp_path, cache):
+    with open(cache.path, "r+b") as f:
+        f.write(b"XXXX")
+    with pytest.raises(RuntimeError):
+        SharedMapsCache(str(tmp_path / "cache"), 1024 * 1024, ttl_seconds=60)
+
+
+def _worker(path: str, index: int) -> int:
+    c = SharedMapsCache(path, 1024 * 1024, ttl_seconds=60)
+    c.set(f"worker{index}", {"index": index})
+    hits = 0
+    for _ in range(200):
+        hits += sum(c.get(f"worker{i}") is not None for i in range(4))
+    c.close()
+    return hits
+
+
+def test_shared_across_processes(tmp_path):
+    path = str(tmp_path / "shared")
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(4) as pool:
+        pool.starmap(_worker, [(path, i) for i in range(4)])
+
+    c = SharedMapsCache(path, 1024 * 1024, ttl_seconds=60)
+    assert [c.get(f"worker{i}") for i in range(4)] == [{"index": i} for i in range(4)]
+    c.close()
+
+
+def test_interrupted_init_is_recovered(tmp_path, cache):
+    path = cache.path
+    with open(path, "r+b") as f:
+        f.write(bytes(shared_cache._HEADER.size))
+    c = SharedMapsCache(str(tmp_path / "cache"), 1024 * 1024, ttl_seconds=60)
+    assert c.path == path
+    c.close()
+
+
+def test_unusable_file_disables_cache_once(tmp_path, monkeypatch, caplog):
+    base = tmp_path / "cache"
+    c = SharedMapsCache(str(base), 1024 * 1024, ttl_seconds=60)
+    with open(c.path, "r+b") as f:
+        f.write(b"XXXX")
+    c.close()
+    settings = SimpleNamespace(maps_cache_path=str(base), maps_cache_bytes=1024 * 1024, maps_cache_ttl_seconds=60)
+    monkeypatch.setattr(shared_cache, "get_settings", lambda: settings)
+    shared_cache.get_maps_cache.cache_clear()
+    try:
+        assert shared_cache.get_maps_cache() is None
+        assert shared_cache.get_maps_cache() is None
+        assert len([r for r in caplog.records if "disabled" in r.getMessage()]) == 1
+    finally:
+        shared_cache.get_maps_cache.cache_clear()